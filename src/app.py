@@ -1,19 +1,30 @@
-from fastapi import FastAPI
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from src.graph.graph import build_workflow
+from src.graph.graph import audit_entry, build_report_workflow
+from src.tools import insurer_api
+from src.tools.audit_trail import log_action
 
-app = FastAPI(title="ESR Orchestrator (LangGraph)")
-wf = build_workflow()
+app = FastAPI(title="ESR Orchestrator (LangGraph)", default_response_class=ORJSONResponse)
+wf = build_report_workflow()
 
 class RunRequest(BaseModel):
     task: str
 
 @app.post("/run")
-async def run(req: RunRequest):
+async def run(req: RunRequest, bg: BackgroundTasks):
     # LangGraph supports async steps; we call ainvoke to run the compiled graph
     out = await wf.ainvoke({"task": req.task})
+    # audit write happens after the response is sent
+    bg.add_task(log_action, audit_entry(out), flush=True)
+    # the audit step now runs here rather than in the graph; keep the completed flag
+    out["done"] = True
     return {"state": out, "report": out.get("report",{})}
 
+@app.on_event("shutdown")
+async def shutdown():
+    await insurer_api.aclose()
+
 @app.get("/health")
 def health():
     return {"ok": True}
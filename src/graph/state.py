@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Any, Dict, List, Optional, TypedDict
 
 class OrchestratorState(TypedDict, total=False):
@@ -8,6 +9,8 @@ class OrchestratorState(TypedDict, total=False):
     docs: Dict[str, Any]
     waste_info: Dict[str, Any]
     compliance: Dict[str, Any]
+    incident_time: datetime
+    recorded_time: datetime
     risk: Dict[str, Any]
     insurer: Dict[str, Any]
     report: Dict[str, Any]
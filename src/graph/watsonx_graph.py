@@ -3,8 +3,11 @@ Enhanced LangGraph workflow with watsonx.ai integration for ESR Orchestrator
 This version allows switching between OpenAI and watsonx.ai LLMs
 """
 
-import json
+import orjson
 import asyncio
+import hashlib
+import os
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, TypedDict, Union
 from datetime import datetime
 
@@ -14,7 +17,7 @@ from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, AIMessage
 
 from ..utils.config import settings
-from ..utils.watsonx_config import create_watsonx_llm, WatsonxConfig, ESR_PROMPTS
+from ..utils.watsonx_config import create_watsonx_llm, WatsonxConfig, ESR_PROMPTS, RETRY_MAX
 from ..tools import (
     knowledge_graph, vector_store, insurer_api, waste_tracking,
     compliance_scoring, risk_detection, report_generation, audit_trail
@@ -22,6 +25,10 @@ from ..tools import (
 from ..prompts.reporter import render_report
 from .state import OrchestratorState
 
+def _dumps(obj: Any) -> str:
+    """Serialize to a JSON string via orjson (C extension, faster than json.dumps)"""
+    return orjson.dumps(obj).decode()
+
 class ESROrchestrator:
     """Enhanced ESR Orchestrator with watsonx.ai support"""
     
@@ -33,7 +40,19 @@ class ESROrchestrator:
             use_watsonx: If True, use watsonx.ai LLM; otherwise use OpenAI
         """
         self.use_watsonx = use_watsonx
-        self.llm = self._initialize_llm()
+        self._llm = None
+        self._llm_pid: Optional[int] = None
+    
+    @property
+    def llm(self):
+        """LLM client for the current process, built on first use"""
+        # built lazily so gunicorn --preload doesn't authenticate and pool
+        # connections in the master that every forked worker would inherit
+        pid = os.getpid()
+        if self._llm_pid != pid:
+            self._llm = self._initialize_llm()
+            self._llm_pid = pid
+        return self._llm
         
     def _initialize_llm(self):
         """Initialize the appropriate LLM based on configuration"""
@@ -46,12 +65,16 @@ class ESROrchestrator:
                 return ChatOpenAI(
                     model="gpt-4",
                     temperature=0.1,
+                    streaming=True,
+                    max_retries=RETRY_MAX,
                     openai_api_key=settings.openai_api_key
                 )
         else:
             return ChatOpenAI(
                 model="gpt-4",
                 temperature=0.1,
+                streaming=True,
+                max_retries=RETRY_MAX,
                 openai_api_key=settings.openai_api_key
             )
     
@@ -79,21 +102,40 @@ class ESROrchestrator:
             messages = [HumanMessage(content=formatted_prompt)]
             response = self.llm.invoke(messages)
             return response.content
+    
+    async def ainvoke_llm(self, prompt: str, context: Optional[Dict] = None) -> str:
+        """
+        Async variant of invoke_llm
+        
+        Args:
+            prompt: The prompt template or direct prompt
+            context: Context variables for prompt formatting
+            
+        Returns:
+            LLM response text
+        """
+        formatted_prompt = prompt.format(**context) if context else prompt
+        return self._text(await self.llm.ainvoke(formatted_prompt))
+    
+    @staticmethod
+    def _text(response: Any) -> str:
+        # watsonx returns str; chat models return a message
+        return getattr(response, "content", response)
 
 # Initialize global orchestrator instance
 orchestrator = ESROrchestrator(use_watsonx=True)  # Set to True for watsonx.ai
 
-async def plan_workflow(state: OrchestratorState) -> OrchestratorState:
-    """Plan the workflow based on incident analysis"""
-    incident_data = state["incident_data"]
-    
-    # Enhanced planning prompt for watsonx.ai
-    planning_prompt = """
+# LRU of planner output keyed by incident content; near-duplicate incidents reuse the plan
+PLAN_CACHE_SIZE = 1024
+_PLAN_VOLATILE_KEYS = ("id", "timestamp")
+_plan_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+
+# Enhanced planning prompt for watsonx.ai (built once, filled per incident;
+# the incident goes last so the static instructions form a shared prefix)
+PLANNING_PROMPT = """
     You are an ESR (Environmental, Safety & Risk) workflow planner. 
     Analyze this incident and create an action plan.
     
-    Incident: {incident}
-    
     Determine which tools are needed:
     1. knowledge_graph: For regulatory compliance lookups
     2. vector_store: For similar incident searches
@@ -106,13 +148,34 @@ async def plan_workflow(state: OrchestratorState) -> OrchestratorState:
     
     Respond with a JSON list of required tools in execution order.
     Example: ["knowledge_graph", "risk_detection", "compliance_scoring", "report_generation"]
+    
+    Incident: {incident}
     """
+
+def _plan_key(incident_data: Dict[str, Any]) -> str:
+    """Hash the incident minus per-request fields (id, timestamp)"""
+    canonical = {k: v for k, v in incident_data.items() if k not in _PLAN_VOLATILE_KEYS}
+    return hashlib.blake2b(orjson.dumps(canonical, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+async def plan_workflow(state: OrchestratorState) -> OrchestratorState:
+    """Plan the workflow based on incident analysis"""
+    incident_data = state["incident_data"]
+    
+    key = _plan_key(incident_data)
+    cached = _plan_cache.get(key)
+    if cached is not None:
+        _plan_cache.move_to_end(key)
+        state["required_tools"] = list(cached)
+        state["current_tool"] = 0
+        return state
     
-    response = orchestrator.invoke_llm(
-        planning_prompt,
-        {"incident": json.dumps(incident_data)}
+    response = await orchestrator.ainvoke_llm(
+        PLANNING_PROMPT,
+        {"incident": _dumps(incident_data)}
     )
     
+    # Fallback plan; only plans actually parsed from the response are cached
+    required_tools = ["risk_detection", "compliance_scoring", "report_generation"]
     try:
         # Extract JSON from response
         if "```json" in response:
@@ -120,13 +183,15 @@ async def plan_workflow(state: OrchestratorState) -> OrchestratorState:
         elif "[" in response and "]" in response:
             json_str = response[response.find("["):response.rfind("]")+1]
         else:
-            # Default plan if parsing fails
-            json_str = '["risk_detection", "compliance_scoring", "report_generation"]'
+            json_str = None
             
-        required_tools = json.loads(json_str)
+        if json_str is not None:
+            required_tools = orjson.loads(json_str)
+            _plan_cache[key] = list(required_tools)
+            if len(_plan_cache) > PLAN_CACHE_SIZE:
+                _plan_cache.popitem(last=False)
     except:
-        # Fallback plan
-        required_tools = ["risk_detection", "compliance_scoring", "report_generation"]
+        pass
     
     state["required_tools"] = required_tools
     state["current_tool"] = 0
@@ -139,10 +204,10 @@ async def knowledge_graph_query(state: OrchestratorState) -> OrchestratorState:
     # Use watsonx.ai for regulatory analysis
     if orchestrator.use_watsonx:
         regulatory_prompt = ESR_PROMPTS["compliance_analysis"].format(
-            incident_data=json.dumps(incident),
+            incident_data=_dumps(incident),
             regulations="EPA, OSHA, DOT hazardous materials regulations"
         )
-        analysis = orchestrator.invoke_llm(regulatory_prompt)
+        analysis = await orchestrator.ainvoke_llm(regulatory_prompt)
     else:
         # Fallback to knowledge graph tool
         analysis = knowledge_graph.find_regulations(
@@ -180,10 +245,10 @@ async def compliance_check(state: OrchestratorState) -> OrchestratorState:
     # Enhanced compliance check using watsonx.ai
     if orchestrator.use_watsonx and "regulatory_data" in state:
         compliance_prompt = ESR_PROMPTS["compliance_analysis"].format(
-            incident_data=json.dumps(incident),
+            incident_data=_dumps(incident),
             regulations=state.get("regulatory_data", {}).get("analysis", "Standard EPA regulations")
         )
-        watsonx_analysis = orchestrator.invoke_llm(compliance_prompt)
+        watsonx_analysis = await orchestrator.ainvoke_llm(compliance_prompt)
         
         # Combine with traditional scoring
         traditional_score = compliance_scoring.calculate_score(incident)
@@ -211,7 +276,7 @@ async def risk_analysis(state: OrchestratorState) -> OrchestratorState:
             material_type=incident.get("material_type", ""),
             location=incident.get("location", "")
         )
-        watsonx_risk = orchestrator.invoke_llm(risk_prompt)
+        watsonx_risk = await orchestrator.ainvoke_llm(risk_prompt)
         
         # Combine with traditional risk detection
         traditional_risk = risk_detection.assess_risk(incident)
@@ -236,11 +301,11 @@ async def insurer_lookup(state: OrchestratorState) -> OrchestratorState:
     if orchestrator.use_watsonx:
         # Generate insurance claim using watsonx.ai
         claim_prompt = ESR_PROMPTS["insurance_claim"].format(
-            incident_data=json.dumps(incident),
+            incident_data=_dumps(incident),
             policy_details="Standard environmental liability policy",
-            damage_assessment=json.dumps(state.get("risk_assessment", {}))
+            damage_assessment=_dumps(state.get("risk_assessment", {}))
         )
-        watsonx_claim = orchestrator.invoke_llm(claim_prompt)
+        watsonx_claim = await orchestrator.ainvoke_llm(claim_prompt)
         
         # Submit to insurer API
         insurer_response = await insurer_api.submit_claim(incident)
@@ -1,28 +1,28 @@
 from pathlib import Path
 
+_HIGH_RISK_ACTION = "- Immediately isolate area; escalate to emergency response per ISO 14001 Clause 8.2"
+_DEFAULT_ACTION = "- Monitor and document remediation steps"
+
 def render_report(facts: dict) -> str:
-    # deterministic, template-based for demo (no token usage)
-    lines = []
-    lines.append("# Incident Report")
+    # deterministic, template-based for demo (no token usage); one f-string build
     inc = facts.get("incident", {})
-    lines.append(f"- **Summary**: {inc.get('summary','N/A')}")
-    lines.append(f"- **Container**: {inc.get('container','N/A')}")
-    lines.append(f"- **Time**: {inc.get('time','N/A')}")
     mats = facts.get("materials", {})
-    lines.append(f"- **Material**: {mats.get('material','N/A')} | Hazard: {mats.get('hazard','Unknown')}")
     comp = facts.get("compliance", {})
-    lines.append(f"- **Compliance Score**: {comp.get('score','?')}")
-    for d in comp.get("details", []):
-        lines.append(f"  - {d['rule']}: {'OK' if d['ok'] else 'MISSING'}")
     risk = facts.get("risk", {})
-    lines.append(f"- **Risk**: {risk.get('risk','?')} | Notes: {', '.join(risk.get('notes',[]))}")
     ins = facts.get("insurer", {})
-    clause = ins.get("clause", "N/A")
-    lines.append(f"- **Insurer Clause**: {clause}")
-    lines.append("\n## Recommended Actions")
-    if risk.get("risk") == "High":
-        lines.append("- Immediately isolate area; escalate to emergency response per ISO 14001 Clause 8.2")
-    else:
-        lines.append("- Monitor and document remediation steps")
-    lines.append("- File required insurer forms within the specified time window")
-    return "\n".join(lines)
+    details = "".join(
+        f"\n  - {d['rule']}: {'OK' if d['ok'] else 'MISSING'}" for d in comp.get("details", [])
+    )
+    return (
+        f"# Incident Report\n"
+        f"- **Summary**: {inc.get('summary','N/A')}\n"
+        f"- **Container**: {inc.get('container','N/A')}\n"
+        f"- **Time**: {inc.get('time','N/A')}\n"
+        f"- **Material**: {mats.get('material','N/A')} | Hazard: {mats.get('hazard','Unknown')}\n"
+        f"- **Compliance Score**: {comp.get('score','?')}{details}\n"
+        f"- **Risk**: {risk.get('risk','?')} | Notes: {', '.join(risk.get('notes',[]))}\n"
+        f"- **Insurer Clause**: {ins.get('clause', 'N/A')}\n"
+        f"\n## Recommended Actions\n"
+        f"{_HIGH_RISK_ACTION if risk.get('risk') == 'High' else _DEFAULT_ACTION}\n"
+        f"- File required insurer forms within the specified time window"
+    )
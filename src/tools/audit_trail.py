@@ -1,14 +1,35 @@
-import json, time
+import atexit, orjson, threading, time
 from pathlib import Path
 
 LOG = Path("audit_log.jsonl")
+FLUSH_EVERY = 64
 
-def log_action(entry: dict | str) -> dict:
+# One handle for the process, opened on the first write so importing the module
+# creates no file; writes land in a 64KB buffer instead of open/append/close per event
+_FH = None
+_LOCK = threading.Lock()
+_pending = 0
+
+def _open():
+    global _FH
+    _FH = LOG.open("ab", buffering=1 << 16)
+    atexit.register(_FH.close)
+    return _FH
+
+def log_action(entry: dict | str, flush: bool = False) -> dict:
+    global _pending
     ts = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
     if isinstance(entry, str):
         payload = {"ts": ts, "event": entry}
     else:
         payload = {"ts": ts, **entry}
-    with LOG.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+    # orjson emits UTF-8 bytes directly; no str round-trip before the write
+    line = orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+    with _LOCK:
+        fh = _FH or _open()
+        fh.write(line)
+        _pending += 1
+        if flush or _pending >= FLUSH_EVERY:
+            fh.flush()
+            _pending = 0
     return {"status": "ok"}
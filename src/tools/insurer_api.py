@@ -1,17 +1,52 @@
-import httpx
+import httpx, orjson, time
+from collections import OrderedDict
 from src.utils.config import settings
 
+# Shared pooled client: keep-alive + HTTP/2 so repeat calls skip the TCP/TLS handshake.
+# Built on first use and rebuilt after aclose(), so a later app lifespan gets a live client.
+_CLIENT: "httpx.AsyncClient | None" = None
+
+def _client() -> httpx.AsyncClient:
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(timeout=10, http2=True, limits=httpx.Limits(max_keepalive_connections=20))
+    return _CLIENT
+
+# clause lookups are static per query; successful reply bodies are kept for CACHE_TTL seconds.
+# Raw bytes are stored so every hit decodes a fresh dict the caller is free to mutate;
+# the least recently used entry is evicted beyond CACHE_SIZE.
+CACHE_TTL = 300
+CACHE_SIZE = 256
+_CACHE: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+
+async def aclose():
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
 async def insurer_call(query: str) -> dict:
+    # mock reply if base is not real
+    if "mockinsurer" in settings.insurer_api_base:
+        return {"clause": "Spills of toxic materials must be reported in 24h; form INS-24."}
+    now = time.monotonic()
+    hit = _CACHE.get(query)
+    if hit:
+        if now - hit[0] < CACHE_TTL:
+            _CACHE.move_to_end(query)
+            return orjson.loads(hit[1])
+        del _CACHE[query]
     # mock GET for demo; replace with real endpoints
     url = f"{settings.insurer_api_base}/v1/clauses"
     headers = {"Authorization": f"Bearer {settings.insurer_api_key}"} if settings.insurer_api_key else {}
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            # mock reply if base is not real
-            if "mockinsurer" in settings.insurer_api_base:
-                return {"clause": "Spills of toxic materials must be reported in 24h; form INS-24."}
-            r = await client.get(url, headers=headers)
-            r.raise_for_status()
-            return r.json()
+        r = await _client().get(url, headers=headers)
+        r.raise_for_status()
+        data = orjson.loads(r.content)
     except Exception as e:
+        # errors are not cached so the next call retries
         return {"error": str(e)}
+    _CACHE[query] = (now, r.content)
+    if len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return data
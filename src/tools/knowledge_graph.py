@@ -1,33 +1,42 @@
 import networkx as nx
 import pandas as pd
+from collections import defaultdict
 from pathlib import Path
 
 class KnowledgeGraph:
     def __init__(self):
         self.G = nx.MultiDiGraph()
+        # (subject, relation) -> targets; lets query() skip edge iteration
+        self._idx: dict[tuple[str, str], list[str]] = defaultdict(list)
+
+    def _add_edge(self, a: str, b: str, relation: str):
+        self.G.add_edge(a, b, relation=relation)
+        self._idx[(a, relation)].append(b)
 
     def init_from_files(self, waste_csv: str, iso_txt: str):
         if Path(waste_csv).exists():
             df = pd.read_csv(waste_csv)
-            for _, r in df.iterrows():
-                wb = str(r["batch_id"])
-                container = str(r["container_id"])
-                material = str(r["material"])
-                self.G.add_node(wb, type="WasteBatch", **r.to_dict())
+            # itertuples avoids building a Series per row as iterrows does
+            for r in df.itertuples(index=False):
+                wb = str(r.batch_id)
+                container = str(r.container_id)
+                material = str(r.material)
+                self.G.add_node(wb, type="WasteBatch", **r._asdict())
                 self.G.add_node(container, type="Container")
                 self.G.add_node(material, type="Material")
-                self.G.add_edge(container, wb, relation="contains_batch")
-                self.G.add_edge(wb, material, relation="contains_material")
+                self._add_edge(container, wb, "contains_batch")
+                self._add_edge(wb, material, "contains_material")
         if Path(iso_txt).exists():
+            # collect materials once rather than re-walking every node per clause
+            materials = [n for n, d in self.G.nodes(data=True) if d.get("type") == "Material"]
             with open(iso_txt, "r", encoding="utf-8") as f:
                 for line in f:
                     clause = line.strip()
                     if clause:
                         self.G.add_node(clause, type="Regulation")
                         # simplistic hook: relate clause to all materials initially
-                        for n, data in self.G.nodes(data=True):
-                            if data.get("type") == "Material":
-                                self.G.add_edge(clause, n, relation="applies_to")
+                        for n in materials:
+                            self._add_edge(clause, n, "applies_to")
 
     def query(self, q: str) -> dict:
         # very simple micro-language: "NODE -> relation -> ?"
@@ -37,12 +46,7 @@ class KnowledgeGraph:
             return {"error": "query format: SUBJECT -> relation -> ?"}
         subj = subj.strip()
         rel = rel.strip()
-        results = []
-        if not self.G.has_node(subj):
-            return {"results": results}
-        for _, tgt, d in self.G.out_edges(subj, data=True):
-            if d.get("relation") == rel:
-                results.append({"from": subj, "relation": rel, "to": tgt})
-        return {"results": results}
+        # .get() rather than [] so misses don't grow the defaultdict
+        return {"results": [{"from": subj, "relation": rel, "to": t} for t in self._idx.get((subj, rel), [])]}
 
 KG = KnowledgeGraph()
@@ -1,20 +1,59 @@
-import faiss, numpy as np, os
+import faiss, numpy as np, os, re, torch
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
+from sentence_transformers import SentenceTransformer
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+_MODEL = None
+
+# HNSW graph params: M neighbours per node, build/search beam widths
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+
+# documents are split on blank lines; shorter fragments are dropped
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+MIN_CHUNK_CHARS = 40
+
+def _chunk(text: str) -> List[str]:
+    chunks = [c.strip() for c in _PARAGRAPH_RE.split(text) if len(c.strip()) > MIN_CHUNK_CHARS]
+    # keep short files whole rather than losing them entirely
+    return chunks or ([text.strip()] if text.strip() else [])
+
+def _get_model() -> SentenceTransformer:
+    # loaded lazily so importing the module doesn't pull model weights
+    global _MODEL
+    if _MODEL is None:
+        _MODEL = SentenceTransformer(EMBED_MODEL)
+    return _MODEL
+
+def _encode(texts: List[str]) -> np.ndarray:
+    # batched sentence-transformer encode; vectors come back L2-normalized
+    with torch.inference_mode():
+        X = _get_model().encode(
+            texts, batch_size=64, show_progress_bar=False,
+            convert_to_numpy=True, normalize_embeddings=True,
+        )
+    return X.astype("float32")
+
+@lru_cache(maxsize=256)
+def _encode_query(query: str) -> np.ndarray:
+    # repeated queries skip the model entirely; the cached array is shared by
+    # every caller, so it is read-only (copy it before normalizing in place)
+    X = _encode([query])
+    X.setflags(write=False)
+    return X
 
 class SimpleFaissStore:
     def __init__(self):
         self.docs: List[str] = []
+        # parallel to docs: (source path, chunk index within that file)
+        self.meta: List[Tuple[str, int]] = []
         self.index = None
 
     def _embed(self, texts: List[str]) -> np.ndarray:
-        # toy embedding: hash-based (replace with real embeddings in prod)
-        arr = np.zeros((len(texts), 384), dtype="float32")
-        for i, t in enumerate(texts):
-            h = abs(hash(t)) % (10**8)
-            np.random.seed(h % (2**32 - 1))
-            arr[i] = np.random.rand(384)
-        return arr
+        return _encode(texts)
 
     def add_dir(self, base_dir: str):
         paths = []
@@ -23,20 +62,37 @@ class SimpleFaissStore:
                 if f.lower().endswith((".txt", ".md")):
                     paths.append(Path(root) / f)
         for p in paths:
-            self.docs.append(p.read_text(encoding="utf-8"))
+            for i, chunk in enumerate(_chunk(p.read_text(encoding="utf-8"))):
+                self.docs.append(chunk)
+                self.meta.append((str(p), i))
         if self.docs:
             X = self._embed(self.docs)
-            self.index = faiss.IndexFlatIP(X.shape[1])
-            faiss.normalize_L2(X)
+            # vectors are normalized, so inner product == cosine similarity;
+            # stored as 8-bit scalar-quantized codes (1 byte/dim vs 4 for fp32)
+            self.index = faiss.IndexHNSWSQ(X.shape[1], faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            self.index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            self.index.train(X)
             self.index.add(X)
+            self.index.hnsw.efSearch = HNSW_EF_SEARCH
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return _encode_query(query)
 
     def search(self, query: str, k: int = 5):
         if not self.docs or self.index is None:
             return {"results": []}
-        qv = self._embed([query]).astype("float32")
-        faiss.normalize_L2(qv)
+        return self.search_prevectorized(_encode_query(query), k)
+
+    def search_prevectorized(self, qv: np.ndarray, k: int = 5):
+        # qv: (1, d) float32, already normalized (see embed_query)
+        if not self.docs or self.index is None:
+            return {"results": []}
         D, I = self.index.search(qv, k)
-        hits = [{"score": float(D[0][i]), "text": self.docs[idx]} for i, idx in enumerate(I[0])]
+        # ANN search pads with -1 when fewer than k neighbours are found
+        hits = [
+            {"score": float(D[0][i]), "text": self.docs[idx], "source": self.meta[idx][0], "chunk": self.meta[idx][1]}
+            for i, idx in enumerate(I[0]) if idx >= 0
+        ]
         return {"results": hits}
 
 VS = SimpleFaissStore()
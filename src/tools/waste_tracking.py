@@ -1,19 +1,27 @@
 import pandas as pd
+from functools import lru_cache
 from pathlib import Path
 
 DATA = Path("data/sample_waste_data.csv")
 
+# Load once at import; per-call lookups are dict hits instead of CSV re-parses
+_DF = pd.read_csv(DATA) if DATA.exists() else pd.DataFrame(columns=["batch_id", "container_id", "material"])
+_BY_CONTAINER = {k: g.to_dict(orient="records") for k, g in _DF.groupby("container_id")}
+_BY_BATCH = {k: g.to_dict(orient="records") for k, g in _DF.groupby("batch_id")}
+
+@lru_cache(maxsize=256)
+def _by_material(selector: str) -> tuple:
+    rows = _DF[_DF["material"].str.contains(selector, case=False, na=False)]
+    return tuple(rows.to_dict(orient="records"))
+
 def get_waste_info(selector: str) -> dict:
     """
     selector can be batch_id like 'WB-789' or container_id like 'C-456'
     """
-    if not DATA.exists():
-        return {"results": []}
-    df = pd.read_csv(DATA)
     if selector.startswith("C-"):
-        rows = df[df["container_id"] == selector]
+        rows = _BY_CONTAINER.get(selector, [])
     elif selector.startswith("WB-"):
-        rows = df[df["batch_id"] == selector]
+        rows = _BY_BATCH.get(selector, [])
     else:
-        rows = df[df["material"].str.contains(selector, case=False, na=False)]
-    return {"results": rows.to_dict(orient="records")}
+        rows = _by_material(selector)
+    return {"results": [dict(r) for r in rows]}
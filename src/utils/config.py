@@ -8,5 +8,7 @@ class Settings(BaseModel):
     openai_api_key: str | None = os.getenv("OPENAI_API_KEY")
     insurer_api_base: str = os.getenv("INSURER_API_BASE", "https://api.mockinsurer.local")
     insurer_api_key: str | None = os.getenv("INSURER_API_KEY")
+    # uvicorn worker processes for `python -m src.watsonx_app`
+    workers: int = int(os.getenv("ESR_WORKERS", "4"))
 
 settings = Settings()
@@ -4,18 +4,27 @@ Allows switching between OpenAI and watsonx.ai LLMs
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
-import json
+import asyncio
+import orjson
+import os
+import time
 from datetime import datetime
+from types import MappingProxyType
 
 from .graph.graph import build_workflow as build_openai_workflow
 from .graph.watsonx_graph import build_workflow as build_watsonx_workflow
+from .tools import insurer_api
+from .utils.config import settings
+from .utils.watsonx_config import open_cache
 
 app = FastAPI(
     title="ESR Orchestrator with watsonx.ai",
     description="Environmental, Safety & Risk management with AI orchestration",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 class IncidentRequest(BaseModel):
@@ -39,22 +48,88 @@ class WorkflowResponse(BaseModel):
     insurance_data: Optional[Dict[str, Any]] = None
     execution_time: str
 
-# Global workflow instances
-openai_workflow = None
-watsonx_workflow = None
+class _Workflows:
+    """Workflow instances, built eagerly at startup"""
+    __slots__ = ("openai", "watsonx")
+    
+    def __init__(self):
+        self.openai = None
+        self.watsonx = None
+
+# plain slotted attributes: cheaper than app.state's __getattr__ or global statements
+_WF = _Workflows()
+
+@app.on_event("startup")
+async def build_workflows():
+    """Build workflows before the first request so no caller pays the construction cost"""
+    _WF.openai = build_openai_workflow()
+    try:
+        # open this worker's LLM cache now, not inside the first request
+        open_cache()
+    except Exception as e:
+        print(f"Warning: LLM response cache not opened at startup: {e}")
+    try:
+        _WF.watsonx = build_watsonx_workflow()
+    except Exception as e:
+        # Leave watsonx lazy so a bad config surfaces on the request that needs it
+        print(f"Warning: watsonx.ai workflow not built at startup: {e}")
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close the pooled insurer API client"""
+    await insurer_api.aclose()
 
 def get_workflow(use_watsonx: bool = False):
     """Get the appropriate workflow instance"""
-    global openai_workflow, watsonx_workflow
-    
     if use_watsonx:
-        if watsonx_workflow is None:
-            watsonx_workflow = build_watsonx_workflow()
-        return watsonx_workflow
-    else:
-        if openai_workflow is None:
-            openai_workflow = build_openai_workflow()
-        return openai_workflow
+        if _WF.watsonx is None:
+            _WF.watsonx = build_watsonx_workflow()
+        return _WF.watsonx
+    if _WF.openai is None:
+        _WF.openai = build_openai_workflow()
+    return _WF.openai
+
+# Per-provider cap on in-flight workflows: bursts queue here instead of
+# tripping provider rate limits. Limits are per process, so N workers allow
+# N times as many concurrent workflows; 429s are retried per LLM call by the
+# provider SDKs (ESR_RETRY_MAX) rather than by re-running the workflow.
+_SEM = {
+    False: asyncio.Semaphore(int(os.getenv("ESR_OPENAI_CONC", "20"))),
+    True: asyncio.Semaphore(int(os.getenv("ESR_WATSONX_CONC", "10")))
+}
+
+async def invoke_with_limits(workflow, initial_state: Dict[str, Any], use_watsonx: bool) -> Dict[str, Any]:
+    """
+    Run a workflow under its provider's semaphore
+    
+    Args:
+        workflow: Compiled workflow to invoke
+        initial_state: Workflow input
+        use_watsonx: Selects the provider semaphore
+        
+    Returns:
+        Final workflow state
+    """
+    async with _SEM[use_watsonx]:
+        return await workflow.ainvoke(initial_state)
+
+# Constant part of every initial state; plan_workflow replaces required_tools
+_INITIAL_SKELETON = MappingProxyType({"required_tools": (), "current_tool": 0})
+
+def build_initial_state(request: IncidentRequest, timestamp: Optional[str] = None) -> Dict[str, Any]:
+    """Build the workflow input state for an incident request"""
+    return {
+        "incident_data": {
+            "id": request.id,
+            "description": request.description,
+            "material_type": request.material_type,
+            "location": request.location,
+            "quantity": request.quantity,
+            "severity": request.severity,
+            "timestamp": timestamp or datetime.now().isoformat()
+        },
+        **_INITIAL_SKELETON
+    }
 
 @app.post("/run", response_model=WorkflowResponse)
 async def run_esr_workflow(request: IncidentRequest):
@@ -68,31 +143,20 @@ async def run_esr_workflow(request: IncidentRequest):
         Complete workflow results with AI analysis
     """
     try:
-        start_time = datetime.now()
+        # monotonic clock for elapsed time (immune to NTP steps); wall clock only for the timestamp
+        t0 = time.monotonic_ns()
         
         # Get appropriate workflow
         workflow = get_workflow(request.use_watsonx)
         llm_provider = "watsonx.ai" if request.use_watsonx else "openai"
         
         # Initial state
-        initial_state = {
-            "incident_data": {
-                "id": request.id,
-                "description": request.description,
-                "material_type": request.material_type,
-                "location": request.location,
-                "quantity": request.quantity,
-                "severity": request.severity,
-                "timestamp": datetime.now().isoformat()
-            },
-            "required_tools": [],
-            "current_tool": 0
-        }
+        initial_state = build_initial_state(request, datetime.now().isoformat())
         
         # Execute workflow
-        result = await workflow.ainvoke(initial_state)
+        result = await invoke_with_limits(workflow, initial_state, request.use_watsonx)
         
-        execution_time = str(datetime.now() - start_time)
+        execution_time = f"{(time.monotonic_ns() - t0) / 1e6:.2f}ms"
         
         # Format response
         response = WorkflowResponse(
@@ -114,6 +178,39 @@ async def run_esr_workflow(request: IncidentRequest):
             detail=f"Workflow execution failed: {str(e)}"
         )
 
+@app.post("/run/stream")
+async def run_esr_workflow_stream(request: IncidentRequest):
+    """
+    Run the ESR workflow and stream its events as Server-Sent Events
+    
+    watsonx calls go through ainvoke, which WatsonxLLM answers in one
+    piece, so watsonx runs stream node-level and LLM start/end events
+    only. Token events come from the ChatOpenAI fallback.
+    
+    Args:
+        request: Incident data with optional watsonx.ai selection
+        
+    Returns:
+        text/event-stream of LangGraph v2 events
+    """
+    initial_state = build_initial_state(request)
+    
+    async def events():
+        try:
+            # a workflow that fails to build is reported as an error event, like any other failure
+            workflow = get_workflow(request.use_watsonx)
+            async with _SEM[request.use_watsonx]:
+                async for event in workflow.astream_events(initial_state, version="v2"):
+                    yield b"data: " + orjson.dumps(event, default=str, option=orjson.OPT_NON_STR_KEYS) + b"\n\n"
+        except Exception as e:
+            yield b"event: error\ndata: " + orjson.dumps({"detail": f"Workflow execution failed: {str(e)}"}) + b"\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+    )
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -128,9 +225,26 @@ async def health_check():
         }
     }
 
+# /providers results per probe depth, reused for PROVIDERS_TTL seconds
+PROVIDERS_TTL = 60
+_providers_cache: Dict[bool, tuple] = {}
+
 @app.get("/providers")
-async def list_providers():
-    """List available LLM providers and their status"""
+async def list_providers(deep: bool = False):
+    """
+    List available LLM providers and their status
+
+    Args:
+        deep: If True, run a real watsonx.ai completion instead of the
+            credential-only probe
+
+    Returns:
+        Provider availability, cached for PROVIDERS_TTL seconds
+    """
+    cached = _providers_cache.get(deep)
+    if cached and time.monotonic() - cached[0] < PROVIDERS_TTL:
+        return cached[1]
+    
     providers = {
         "openai": {
             "available": True,
@@ -146,20 +260,21 @@ async def list_providers():
     
     # Test watsonx.ai availability
     try:
-        from .utils.watsonx_config import test_watsonx_integration
-        providers["watsonx"]["available"] = test_watsonx_integration()
+        from .utils.watsonx_config import check_watsonx_config, atest_watsonx_integration
+        providers["watsonx"]["available"] = await atest_watsonx_integration() if deep else check_watsonx_config()
         providers["watsonx"]["status"] = "ready" if providers["watsonx"]["available"] else "configuration_needed"
     except Exception as e:
         providers["watsonx"]["status"] = f"error: {str(e)}"
     
+    _providers_cache[deep] = (time.monotonic(), providers)
     return providers
 
 @app.post("/test-watsonx")
 async def test_watsonx_endpoint():
     """Test watsonx.ai integration endpoint"""
     try:
-        from .utils.watsonx_config import test_watsonx_integration
-        success = test_watsonx_integration()
+        from .utils.watsonx_config import atest_watsonx_integration
+        success = await atest_watsonx_integration()
         
         if success:
             return {
@@ -181,4 +296,13 @@ async def test_watsonx_endpoint():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8010)
+    # One process per worker: each runs the startup hook and builds its own workflows.
+    # The sqlite LLM response cache is one file shared by all workers.
+    uvicorn.run(
+        "src.watsonx_app:app",
+        host="0.0.0.0",
+        port=8010,
+        workers=settings.workers,
+        loop="uvloop",
+        http="httptools"
+    )
@@ -5,11 +5,42 @@ Run various test cases to validate your solution with different data scenarios.
 """
 
 import asyncio
+import atexit
 import httpx
-import json
+import logging
+import logging.handlers
+import math
+import orjson
+import os
+import queue
+import statistics
+import time
 from pathlib import Path
 
+log = logging.getLogger("esr-tests")
+
+def setup_logging(level: int = logging.INFO):
+    """Route output through a queue so coroutines never block on terminal I/O."""
+    q = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(q, stream)
+    listener.start()
+    atexit.register(listener.stop)
+    log.addHandler(logging.handlers.QueueHandler(q))
+    log.setLevel(level)
+    log.propagate = False
+
 BASE_URL = "http://localhost:8010"
+CONCURRENCY = int(os.getenv("ESR_TEST_CONCURRENCY", "4"))
+
+def make_client() -> httpx.AsyncClient:
+    """One pooled client per run: keep-alive connections so scenarios skip repeated TCP handshakes."""
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        timeout=httpx.Timeout(60.0),
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    )
 
 # Test scenarios based on your sample data and real-world ESR cases
 TEST_SCENARIOS = [
@@ -37,121 +68,180 @@ TEST_SCENARIOS = [
 
 async def test_scenario(client: httpx.AsyncClient, scenario: dict) -> dict:
     """Test a single scenario against the ESR orchestrator."""
-    print(f"\n🧪 Testing: {scenario['name']}")
-    print(f"📝 Task: {scenario['task'][:100]}...")
+    log.info("\n🧪 Testing: %s\n📝 Task: %s...", scenario["name"], scenario["task"][:100])
     
     try:
+        t0 = time.monotonic_ns()
         response = await client.post(
-            f"{BASE_URL}/run",
+            "/run",
             json={"task": scenario["task"]},
             timeout=60.0
         )
+        latency_ms = round((time.monotonic_ns() - t0) / 1e6, 2)
         response.raise_for_status()
-        result = response.json()
-        
-        print(f"✅ Status: Success")
-        print(f"📊 Response keys: {list(result.keys())}")
+        result = orjson.loads(response.content)
         
-        if "report" in result:
-            report = result["report"]
-            print(f"📋 Report sections: {list(report.keys()) if isinstance(report, dict) else 'N/A'}")
+        log.info("✅ %s: Success in %.2fms", scenario["name"], latency_ms)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("📊 Response keys: %s", list(result.keys()))
+            if "report" in result:
+                report = result["report"]
+                log.debug("📋 Report sections: %s", list(report.keys()) if isinstance(report, dict) else "N/A")
         
         return {
             "scenario": scenario["name"],
             "status": "success",
+            "latency_ms": latency_ms,
             "result": result
         }
         
     except httpx.TimeoutException:
-        print(f"⏰ Timeout: Request took longer than 60 seconds")
+        log.info("⏰ %s: Timeout, request took longer than 60 seconds", scenario["name"])
         return {"scenario": scenario["name"], "status": "timeout"}
     except httpx.HTTPStatusError as e:
-        print(f"❌ HTTP Error: {e.response.status_code}")
+        log.info("❌ %s: HTTP Error %s", scenario["name"], e.response.status_code)
         return {"scenario": scenario["name"], "status": "http_error", "error": str(e)}
     except Exception as e:
-        print(f"💥 Error: {str(e)}")
+        log.info("💥 %s: Error %s", scenario["name"], e)
         return {"scenario": scenario["name"], "status": "error", "error": str(e)}
 
-async def check_server_health():
+async def check_server_health(client: httpx.AsyncClient):
     """Verify the server is running and healthy."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{BASE_URL}/health", timeout=5.0)
-            response.raise_for_status()
-            print("✅ Server is healthy and ready for testing")
-            return True
+        response = await client.get("/health", timeout=5.0)
+        response.raise_for_status()
+        log.info("✅ Server is healthy and ready for testing")
+        return True
     except Exception as e:
-        print(f"❌ Server health check failed: {e}")
-        print(f"💡 Make sure to start the server first:")
-        print(f"   uvicorn src.app:app --reload --port 8010")
+        log.info("❌ Server health check failed: %s", e)
+        log.info("💡 Make sure to start the server first:\n   uvicorn src.app:app --reload --port 8010")
         return False
 
 async def run_all_tests():
     """Run all test scenarios."""
-    print("🚀 ESR Orchestrator Test Suite")
-    print("=" * 50)
-    
-    if not await check_server_health():
-        return
+    log.info("🚀 ESR Orchestrator Test Suite\n%s", "=" * 50)
     
     results = []
     
-    async with httpx.AsyncClient() as client:
-        for scenario in TEST_SCENARIOS:
-            result = await test_scenario(client, scenario)
-            results.append(result)
-            
-            # Brief pause between tests
-            await asyncio.sleep(1)
+    async with make_client() as client:
+        if not await check_server_health(client):
+            return
+        
+        # Scenarios run concurrently; the semaphore bounds load on the server
+        sem = asyncio.Semaphore(CONCURRENCY)
+        
+        async def run_one(scenario):
+            async with sem:
+                return await test_scenario(client, scenario)
+        
+        outcomes = await asyncio.gather(
+            *(run_one(s) for s in TEST_SCENARIOS), return_exceptions=True
+        )
+        # gather keeps input order, so results line up with TEST_SCENARIOS
+        for scenario, outcome in zip(TEST_SCENARIOS, outcomes):
+            if isinstance(outcome, BaseException):
+                outcome = {"scenario": scenario["name"], "status": "error", "error": str(outcome)}
+            results.append(outcome)
     
     # Summary
-    print("\n📈 Test Summary")
-    print("=" * 30)
+    log.info("\n📈 Test Summary\n%s", "=" * 30)
     success_count = sum(1 for r in results if r["status"] == "success")
     total_count = len(results)
-    print(f"✅ Successful: {success_count}/{total_count}")
+    log.info("✅ Successful: %d/%d", success_count, total_count)
     
     if success_count < total_count:
-        print("\n❌ Failed tests:")
+        log.info("\n❌ Failed tests:")
         for result in results:
             if result["status"] != "success":
-                print(f"  - {result['scenario']}: {result['status']}")
+                log.info("  - %s: %s", result["scenario"], result["status"])
     
     # Save detailed results
     results_file = Path("test_results.json")
-    with open(results_file, "w") as f:
-        json.dump(results, f, indent=2, default=str)
-    print(f"\n💾 Detailed results saved to: {results_file}")
+    results_file.write_bytes(
+        orjson.dumps(results, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    )
+    log.info("\n💾 Detailed results saved to: %s", results_file)
 
 def run_single_test(scenario_name: str = None):
     """Run a specific test scenario."""
     if scenario_name:
         scenario = next((s for s in TEST_SCENARIOS if s["name"] == scenario_name), None)
         if not scenario:
-            print(f"❌ Scenario '{scenario_name}' not found")
-            print("Available scenarios:")
+            log.info("❌ Scenario '%s' not found\nAvailable scenarios:", scenario_name)
             for s in TEST_SCENARIOS:
-                print(f"  - {s['name']}")
+                log.info("  - %s", s["name"])
             return
         scenarios = [scenario]
     else:
         scenarios = TEST_SCENARIOS
     
     async def run_tests():
-        if not await check_server_health():
-            return
-        
-        async with httpx.AsyncClient() as client:
+        async with make_client() as client:
+            if not await check_server_health(client):
+                return
+            
             for scenario in scenarios:
                 result = await test_scenario(client, scenario)
-                print(f"\nResult: {json.dumps(result, indent=2, default=str)}")
+                log.info("\nResult: %s", orjson.dumps(result, default=str, option=orjson.OPT_INDENT_2).decode())
     
     asyncio.run(run_tests())
 
+async def benchmark(coro_factory, iterations: int = 10) -> dict:
+    """Await coro_factory() `iterations` times and summarize latency in seconds."""
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await coro_factory()
+        samples.append(time.perf_counter() - t0)
+    ordered = sorted(samples)
+    return {
+        "mean": statistics.fmean(ordered),
+        "median": statistics.median(ordered),
+        "p95": ordered[math.ceil(0.95 * len(ordered)) - 1],
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+async def run_benchmarks(iterations: int = 10):
+    """Benchmark each scenario end-to-end and save latency_report.json."""
+    log.info("⏱️  ESR Orchestrator Benchmark (%d iterations per scenario)\n%s", iterations, "=" * 50)
+    
+    report = {}
+    async with make_client() as client:
+        if not await check_server_health(client):
+            return
+        
+        for scenario in TEST_SCENARIOS:
+            async def call(task=scenario["task"]):
+                response = await client.post("/run", json={"task": task}, timeout=60.0)
+                response.raise_for_status()
+            
+            try:
+                stats = await benchmark(call, iterations)
+            except Exception as e:
+                log.info("💥 %s: %s", scenario["name"], e)
+                report[scenario["name"]] = {"error": str(e)}
+                continue
+            log.info("📊 %s: mean %.3fs | p95 %.3fs", scenario["name"], stats["mean"], stats["p95"])
+            report[scenario["name"]] = stats
+    
+    report_file = Path("latency_report.json")
+    report_file.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    log.info("\n💾 Latency report saved to: %s", report_file)
+
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) > 1:
+    setup_logging(logging.DEBUG if os.getenv("ESR_TEST_DEBUG") else logging.INFO)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench":
+        asyncio.run(run_benchmarks(int(sys.argv[2]) if len(sys.argv) > 2 else 10))
+    elif len(sys.argv) > 1:
         scenario_name = sys.argv[1]
         run_single_test(scenario_name)
     else:
@@ -0,0 +1,65 @@
+import asyncio
+import hashlib
+
+import numpy as np
+import pytest
+import sentence_transformers
+
+from src.tools import audit_trail
+
+# Tests must not download all-MiniLM-L6-v2; vector_store picks this stub up
+# at import because conftest runs first.
+class _StubEncoder:
+    """Deterministic hash-seeded vectors with the model's output shape"""
+
+    def __init__(self, model_name: str, *args, **kwargs):
+        self.model_name = model_name
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        X = np.stack([
+            np.random.default_rng(int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), "little")).random(384)
+            for t in texts
+        ]).astype("float32")
+        if normalize_embeddings:
+            X /= np.linalg.norm(X, axis=1, keepdims=True)
+        return X
+
+sentence_transformers.SentenceTransformer = _StubEncoder
+
+@pytest.fixture(autouse=True)
+def _audit_log(tmp_path, monkeypatch):
+    """Send audit entries to a per-test file instead of ./audit_log.jsonl"""
+    monkeypatch.setattr(audit_trail, "LOG", tmp_path / "audit_log.jsonl")
+    monkeypatch.setattr(audit_trail, "_FH", None)
+    yield
+    if audit_trail._FH is not None:
+        audit_trail._FH.close()
+
+class CountingFake:
+    """Async stand-in that counts calls; reply is a value or a function of the call number"""
+
+    def __init__(self, reply=None):
+        self.calls = 0
+        self.reply = reply
+
+    async def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.reply(self.calls) if callable(self.reply) else self.reply
+
+@pytest.fixture
+def counting_fake():
+    return CountingFake
+
+@pytest.fixture
+def empty_cache(monkeypatch):
+    """Swap a module-level cache for an empty one of the same type for one test"""
+    def swap(module, name):
+        cache = type(getattr(module, name))()
+        monkeypatch.setattr(module, name, cache)
+        return cache
+    return swap
+
+@pytest.fixture
+def arun():
+    """Run a coroutine to completion on a fresh event loop"""
+    return asyncio.run
@@ -0,0 +1,12 @@
+import asyncio
+
+from src.graph.graph import build_workflow
+
+def test_workflow_runs_end_to_end():
+    out = asyncio.run(build_workflow().ainvoke({"task": "Leak in container C-456 at site A"}))
+    # fan-out branches all reached the join and fed the report
+    assert out["graph_results"]["container"] == "C-456"
+    assert "score" in out["compliance"]
+    assert out["insurer"]
+    assert out["report"]
+    assert out["done"] is True
@@ -0,0 +1,59 @@
+import types
+
+import httpx
+import orjson
+import pytest
+
+from src.tools import insurer_api
+
+def _reply(n):
+    if _reply.fail:
+        raise httpx.ConnectError("insurer down")
+    return httpx.Response(200, content=orjson.dumps({"clause": f"reply-{n}"}), request=httpx.Request("GET", "https://insurer.test"))
+
+@pytest.fixture
+def get(monkeypatch, counting_fake, empty_cache):
+    _reply.fail = False
+    fake = counting_fake(_reply)
+    monkeypatch.setattr(insurer_api.settings, "insurer_api_base", "https://insurer.test")
+    monkeypatch.setattr(insurer_api, "_client", lambda: types.SimpleNamespace(get=fake))
+    empty_cache(insurer_api, "_CACHE")
+    return fake
+
+@pytest.fixture
+def call(arun):
+    return lambda query: arun(insurer_api.insurer_call(query))
+
+def test_hit_skips_request_and_returns_fresh_dict(get, call):
+    first = call("spill")
+    first["clause"] = "mutated"
+    assert call("spill") == {"clause": "reply-1"}
+    assert call("spill") is not call("spill")
+    assert get.calls == 1
+
+def test_entry_expires_after_ttl(get, call, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(insurer_api.time, "monotonic", lambda: now[0])
+    call("spill")
+    now[0] += insurer_api.CACHE_TTL - 1
+    assert call("spill") == {"clause": "reply-1"}
+    now[0] += 2
+    assert call("spill") == {"clause": "reply-2"}
+    assert get.calls == 2
+
+def test_lru_entry_evicted_beyond_cache_size(get, call, monkeypatch):
+    monkeypatch.setattr(insurer_api, "CACHE_SIZE", 2)
+    call("a")
+    call("b")
+    call("a")  # refresh a, so b is least recently used
+    call("c")
+    assert list(insurer_api._CACHE) == ["a", "c"]
+    call("b")
+    assert get.calls == 4
+
+def test_errors_are_not_cached(get, call):
+    _reply.fail = True
+    assert "error" in call("spill")
+    _reply.fail = False
+    assert call("spill") == {"clause": "reply-2"}
+    assert "spill" in insurer_api._CACHE
@@ -0,0 +1,44 @@
+import importlib
+
+import pytest
+
+INCIDENT = {"id": "INC-1", "timestamp": "2026-01-01T00:00:00", "material_type": "lead", "location": "Site-A"}
+PLAN = '["risk_detection", "report_generation"]'
+
+def _no_client(*args, **kwargs):
+    raise AssertionError("test built a live LLM client")
+
+@pytest.fixture
+def watsonx_graph(monkeypatch):
+    # never build a real client, even if a developer's .env has credentials
+    monkeypatch.setattr("src.utils.watsonx_config.create_watsonx_llm", _no_client)
+    monkeypatch.setattr("langchain_openai.ChatOpenAI", _no_client)
+    module = importlib.import_module("src.graph.watsonx_graph")
+    monkeypatch.setattr(module, "create_watsonx_llm", _no_client)
+    monkeypatch.setattr(module, "ChatOpenAI", _no_client)
+    return module
+
+@pytest.fixture
+def llm(watsonx_graph, monkeypatch, counting_fake, empty_cache):
+    fake = counting_fake(PLAN)
+    monkeypatch.setattr(watsonx_graph.orchestrator, "ainvoke_llm", fake)
+    empty_cache(watsonx_graph, "_plan_cache")
+    return fake
+
+@pytest.fixture
+def plan(watsonx_graph, arun):
+    return lambda incident: arun(watsonx_graph.plan_workflow({"incident_data": incident}))["required_tools"]
+
+def test_hit_skips_llm(llm, plan):
+    assert plan(INCIDENT) == ["risk_detection", "report_generation"]
+    # same incident under a new id/timestamp reuses the plan
+    assert plan({**INCIDENT, "id": "INC-2", "timestamp": "2026-01-02T00:00:00"}) == ["risk_detection", "report_generation"]
+    assert llm.calls == 1
+
+def test_fallback_plan_not_cached(llm, plan, watsonx_graph):
+    llm.reply = "no plan here"
+    assert plan(INCIDENT) == ["risk_detection", "compliance_scoring", "report_generation"]
+    assert not watsonx_graph._plan_cache
+    llm.reply = '["knowledge_graph"]'
+    assert plan(INCIDENT) == ["knowledge_graph"]
+    assert llm.calls == 2